@@ -10,84 +10,108 @@ import os
 import json
 import datetime
 import argparse
+import asyncio
+import functools
+import time
+from collections import defaultdict
 from typing import List, Dict, Any, Optional
 from dotenv import load_dotenv
-from anthropic import Anthropic, HUMAN_PROMPT, AI_PROMPT
-from calendar_api import GoogleCalendarAPI, get_last_seven_days_events
+from anthropic import Anthropic, AsyncAnthropic, HUMAN_PROMPT, AI_PROMPT
+try:
+    from orjson import loads as _json_loads
+except ImportError:
+    _json_loads = functools.partial(json.loads, strict=False)
+from calendar_analysis_common import DEFAULT_DAYS, get_calendar_events, categorize_events, display_analysis
 
 # Load environment variables from .env file
 load_dotenv()
 
-# Default number of days to analyze
-DEFAULT_DAYS = 7
+# Claude model and system prompt used for calendar analysis
+CLAUDE_MODEL = "claude-3-haiku-20240307"
+SYSTEM_PROMPT = "You are a helpful assistant that analyzes calendar data and provides insightful time management advice. Always return valid JSON."
 
-def get_calendar_events(days_back: int = DEFAULT_DAYS, include_details: bool = True) -> List[Dict[str, Any]]:
-    """
-    Retrieve calendar events from the specified number of days back.
-    
-    Args:
-        days_back: Number of days to look back for events.
-        include_details: Whether to include additional event details.
-        
-    Returns:
-        List of formatted calendar events.
-    """
-    calendar_api = GoogleCalendarAPI()
-    events = calendar_api.get_events(days_back=days_back)
-    return calendar_api.format_events(events, include_details=include_details)
+# Seconds between status checks while waiting on a Message Batch
+BATCH_POLL_INTERVAL = 5
+
+# Translation table mapping ASCII control characters to spaces
+_CONTROL_CHARS_TO_SPACE = dict.fromkeys(range(32), ord(' '))
+
+# Analysis prompt, split around the events text so it is only built once
+_PROMPT_HEAD = """
+I'm going to provide you with my calendar events from the past few days. Please analyze them and provide:
+
+1. A concise summary of my schedule
+2. An analysis of the frequency and balance of different types of events
+3. Recommendations for how I might better balance my time in the coming days
 
-def categorize_events(events: List[Dict[str, Any]]) -> Dict[str, List[Dict[str, Any]]]:
+Here are my calendar events:
+
+"""
+_PROMPT_TAIL = """
+
+Please format your response as JSON with the following structure:
+{
+    "summary": "A paragraph summarizing my schedule",
+    "analysis": "A paragraph analyzing the frequency and balance of different types of events",
+    "recommendations": "A paragraph with specific recommendations for better time management"
+}
+
+Ensure your JSON is valid and does not contain any control characters, newlines within strings, or other invalid JSON syntax.
+"""
+
+# Tool Claude is required to call, so the analysis arrives as structured input
+ANALYSIS_TOOL = {
+    "name": "report_analysis",
+    "description": "Report the calendar analysis.",
+    "input_schema": {
+        "type": "object",
+        "properties": {
+            "summary": {"type": "string", "description": "A paragraph summarizing the schedule"},
+            "analysis": {"type": "string", "description": "A paragraph analyzing the frequency and balance of different types of events"},
+            "recommendations": {"type": "string", "description": "A paragraph with specific recommendations for better time management"}
+        },
+        "required": ["summary", "analysis", "recommendations"]
+    }
+}
+
+def _format_event_for_claude(event: Dict[str, Any]) -> str:
     """
-    Attempt to categorize events into common types based on their titles and descriptions.
-    This is a simple heuristic approach that can be improved with more sophisticated methods.
+    Format a single calendar event as a block of text for Claude.
     
     Args:
-        events: List of calendar events.
+        event: A formatted calendar event.
         
     Returns:
-        Dictionary mapping category names to lists of events.
+        The event's lines, including the trailing blank line.
     """
-    categories = {
-        "work": [],
-        "meeting": [],
-        "personal": [],
-        "travel": [],
-        "social": [],
-        "health": [],
-        "other": []
-    }
+    # Format event time
+    if event['is_all_day']:
+        time_str = "All day"
+    else:
+        time_str = event['start'].split('T')[1][:5] if 'T' in event['start'] else 'All day'
     
-    # Simple keyword-based categorization
-    keywords = {
-        "work": ["work", "project", "deadline", "report", "task", "review", "client"],
-        "meeting": ["meeting", "call", "conference", "sync", "discussion", "interview", "1:1", "1on1"],
-        "travel": ["flight", "train", "trip", "travel", "commute", "drive", "airport"],
-        "social": ["dinner", "lunch", "coffee", "drinks", "party", "celebration", "birthday", "wedding", "restaurant"],
-        "health": ["doctor", "dentist", "gym", "workout", "exercise", "therapy", "medical", "appointment"],
-    }
+    # Format event details
+    lines = [f"- {time_str}: {event['summary']}\n"]
     
-    for event in events:
-        title = event.get("summary", "").lower()
-        desc = event.get("description", "").lower()
-        location = event.get("location", "").lower()
-        combined_text = f"{title} {desc} {location}"
-        
-        # Try to match to a category
-        matched = False
-        for category, terms in keywords.items():
-            if any(term in combined_text for term in terms):
-                categories[category].append(event)
-                matched = True
-                break
-        
-        # If no match, check if it's likely personal or put in "other"
-        if not matched:
-            if any(attendee.split('@')[0] in title.lower() for attendee in event.get("attendees", [])):
-                categories["personal"].append(event)
-            else:
-                categories["other"].append(event)
-    
-    return categories
+    if 'location' in event and event['location']:
+        lines.append(f"  Location: {event['location']}\n")
+    
+    if 'description' in event and event['description']:
+        # Truncate long descriptions
+        desc = event['description']
+        if len(desc) > 100:
+            desc = desc[:97] + "..."
+        lines.append(f"  Description: {desc}\n")
+    
+    if 'attendees' in event and event['attendees']:
+        attendees = event['attendees']
+        attendee_str = ", ".join(attendees[:3])
+        if len(attendees) > 3:
+            attendee_str += f" and {len(attendees) - 3} more"
+        lines.append(f"  Attendees: {attendee_str}\n")
+    
+    lines.append("\n")
+    return "".join(lines)
 
 def format_events_for_claude(events: List[Dict[str, Any]], days_back: int) -> str:
     """
@@ -104,70 +128,36 @@ def format_events_for_claude(events: List[Dict[str, Any]], days_back: int) -> st
         return "No events found in the specified time period."
     
     # Group events by day
-    events_by_day = {}
+    events_by_day = defaultdict(list)
     for event in events:
         # Get just the date part
-        date_str = event['start'].split('T')[0] if 'T' in event['start'] else event['start']
-        
-        if date_str not in events_by_day:
-            events_by_day[date_str] = []
-        
-        events_by_day[date_str].append(event)
+        events_by_day[event['start'].partition('T')[0]].append(event)
     
     # Format events grouped by day
-    formatted_text = f"Calendar Events for the Past {days_back} Days:\n\n"
+    parts = [f"Calendar Events for the Past {days_back} Days:\n\n"]
     
     for date, day_events in sorted(events_by_day.items()):
-        formatted_text += f"Date: {date} ({len(day_events)} events)\n"
-        
-        for event in day_events:
-            # Format event time
-            if event['is_all_day']:
-                time_str = "All day"
-            else:
-                time_str = event['start'].split('T')[1][:5] if 'T' in event['start'] else 'All day'
-            
-            # Format event details
-            formatted_text += f"- {time_str}: {event['summary']}\n"
-            
-            if 'location' in event and event['location']:
-                formatted_text += f"  Location: {event['location']}\n"
-            
-            if 'description' in event and event['description']:
-                # Truncate long descriptions
-                desc = event['description']
-                if len(desc) > 100:
-                    desc = desc[:97] + "..."
-                formatted_text += f"  Description: {desc}\n"
-            
-            if 'attendees' in event and event['attendees']:
-                attendees = event['attendees']
-                attendee_str = ", ".join(attendees[:3])
-                if len(attendees) > 3:
-                    attendee_str += f" and {len(attendees) - 3} more"
-                formatted_text += f"  Attendees: {attendee_str}\n"
-            
-            formatted_text += "\n"
+        parts.append(f"Date: {date} ({len(day_events)} events)\n")
+        parts.extend(_format_event_for_claude(event) for event in day_events)
     
     # Add categorized events
     categories = categorize_events(events)
-    formatted_text += "\nEvent Categories:\n"
+    parts.append("\nEvent Categories:\n")
     for category, category_events in categories.items():
         if category_events:
-            formatted_text += f"{category.capitalize()}: {len(category_events)} events\n"
+            parts.append(f"{category.capitalize()}: {len(category_events)} events\n")
     
-    return formatted_text
+    return "".join(parts)
 
-def get_claude_analysis(events_text: str, api_key: Optional[str] = None) -> Dict[str, str]:
+def _resolve_api_key(api_key: Optional[str]) -> str:
     """
-    Use Anthropic's Claude API to analyze calendar events.
+    Return the Anthropic API key to use, falling back to the environment.
     
     Args:
-        events_text: Formatted string of calendar events.
         api_key: Anthropic API key. If None, will try to get from environment.
         
     Returns:
-        Dictionary containing summary, analysis, and recommendations.
+        A non-empty Anthropic API key.
     """
     if not api_key:
         api_key = os.environ.get("ANTHROPIC_API_KEY")
@@ -176,112 +166,254 @@ def get_claude_analysis(events_text: str, api_key: Optional[str] = None) -> Dict
                 "No valid Anthropic API key provided. Either pass it as an argument or "
                 "set it in the .env file or ANTHROPIC_API_KEY environment variable."
             )
+    return api_key
+
+@functools.lru_cache(maxsize=4)
+def _get_client(api_key: str) -> Anthropic:
+    """
+    Return a shared synchronous Anthropic client for the given API key.
     
-    try:
-        # Initialize the Anthropic client
-        client = Anthropic(api_key=api_key)
+    Args:
+        api_key: Anthropic API key.
         
-        prompt = f"""
-        I'm going to provide you with my calendar events from the past few days. Please analyze them and provide:
-
-        1. A concise summary of my schedule
-        2. An analysis of the frequency and balance of different types of events
-        3. Recommendations for how I might better balance my time in the coming days
-
-        Here are my calendar events:
-
-        {events_text}
+    Returns:
+        An Anthropic client reused across calls.
+    """
+    return Anthropic(api_key=api_key)
 
-        Please format your response as JSON with the following structure:
-        {{
-            "summary": "A paragraph summarizing my schedule",
-            "analysis": "A paragraph analyzing the frequency and balance of different types of events",
-            "recommendations": "A paragraph with specific recommendations for better time management"
-        }}
-        
-        Ensure your JSON is valid and does not contain any control characters, newlines within strings, or other invalid JSON syntax.
-        """
+def _message_params(events_text: str) -> Dict[str, Any]:
+    """
+    Build the Messages API parameters for analyzing a block of calendar events.
+    
+    Args:
+        events_text: Formatted string of calendar events.
         
-        # Send the request to Claude
-        response = client.messages.create(
-            model="claude-3-haiku-20240307",  # Using a more recent model
-            max_tokens=2000,
-            temperature=0.2,
-            system="You are a helpful assistant that analyzes calendar data and provides insightful time management advice. Always return valid JSON.",
-            messages=[
-                {"role": "user", "content": prompt}
-            ]
-        )
+    Returns:
+        Keyword arguments for ``client.messages.create`` (also used as batch params).
+    """
+    return {
+        "model": CLAUDE_MODEL,
+        "max_tokens": 2000,
+        "temperature": 0.2,
+        "system": SYSTEM_PROMPT,
+        "tools": [ANALYSIS_TOOL],
+        "tool_choice": {"type": "tool", "name": ANALYSIS_TOOL["name"]},
+        "messages": [
+            {"role": "user", "content": _PROMPT_HEAD + events_text + _PROMPT_TAIL}
+        ]
+    }
+
+def _parse_analysis(content: str) -> Dict[str, str]:
+    """
+    Extract the analysis JSON object from Claude's response text.
+    
+    Args:
+        content: Text content of Claude's response.
         
-        # Extract the JSON response
-        content = response.content[0].text
+    Returns:
+        Dictionary containing summary, analysis, and recommendations.
+    """
+    # Look for JSON structure
+    start_idx = content.find('{')
+    end_idx = content.rfind('}') + 1
+    
+    if start_idx >= 0 and end_idx > start_idx:
+        json_str = content[start_idx:end_idx]
         
-        # Look for JSON structure
-        start_idx = content.find('{')
-        end_idx = content.rfind('}') + 1
+        # Clean the JSON string to remove potential control characters
+        # Replace common control characters with spaces
+        json_str = json_str.translate(_CONTROL_CHARS_TO_SPACE)
         
-        if start_idx >= 0 and end_idx > start_idx:
-            json_str = content[start_idx:end_idx]
-            
-            # Clean the JSON string to remove potential control characters
-            # Replace common control characters with spaces
-            for i in range(32):
-                json_str = json_str.replace(chr(i), ' ')
-            
-            # Handle escaped characters properly
-            json_str = json_str.replace('\\"', '"')
-            json_str = json_str.replace('\\n', ' ')
-            
-            try:
-                return json.loads(json_str)
-            except json.JSONDecodeError as e:
-                print(f"JSON parsing error: {e}")
-                print(f"Problematic JSON: {json_str}")
-                # Fall back to a structured response
-                return {
-                    "summary": "Error parsing Claude's response as JSON.",
-                    "analysis": "The API returned a response that couldn't be parsed as JSON.",
-                    "recommendations": f"Technical details: {str(e)}"
-                }
-        else:
-            # If no JSON found, create a structured response from the text
+        try:
+            return _json_loads(json_str)
+        except json.JSONDecodeError as e:
+            print(f"JSON parsing error: {e}")
+            print(f"Problematic JSON: {json_str}")
+            # Fall back to a structured response
             return {
                 "summary": "Error parsing Claude's response as JSON.",
-                "analysis": content,
-                "recommendations": "Please check the API response format."
+                "analysis": "The API returned a response that couldn't be parsed as JSON.",
+                "recommendations": f"Technical details: {str(e)}"
             }
-    except Exception as e:
+    else:
+        # If no JSON found, create a structured response from the text
         return {
-            "summary": f"Error: {str(e)}",
-            "analysis": "Unable to analyze the calendar data.",
-            "recommendations": "Please check your API key and try again."
+            "summary": "Error parsing Claude's response as JSON.",
+            "analysis": content,
+            "recommendations": "Please check the API response format."
         }
 
-def display_analysis(analysis: Dict[str, str]):
+def _analysis_from_message(message: Any) -> Dict[str, str]:
+    """
+    Extract the analysis from a Claude message.
+    
+    Args:
+        message: A Messages API response.
+        
+    Returns:
+        Dictionary containing summary, analysis, and recommendations.
+    """
+    for block in message.content:
+        if block.type == "tool_use":
+            return dict(block.input)
+    
+    # Fall back to parsing JSON out of any free-form text
+    return _parse_analysis("".join(block.text for block in message.content if block.type == "text"))
+
+def _error_analysis(error: Any) -> Dict[str, str]:
     """
-    Display the calendar analysis in a formatted way.
+    Build the structured response returned when an analysis request fails.
     
     Args:
-        analysis: Dictionary containing summary, analysis, and recommendations.
+        error: The exception or API error describing the failure.
+        
+    Returns:
+        Dictionary containing summary, analysis, and recommendations.
     """
-    print("\n" + "=" * 80)
-    print("CALENDAR ANALYSIS".center(80))
-    print("=" * 80 + "\n")
-    
-    print("📅 SUMMARY")
-    print("-" * 80)
-    print(analysis.get("summary", "No summary available."))
-    print()
-    
-    print("📊 ANALYSIS")
-    print("-" * 80)
-    print(analysis.get("analysis", "No analysis available."))
-    print()
-    
-    print("💡 RECOMMENDATIONS")
-    print("-" * 80)
-    print(analysis.get("recommendations", "No recommendations available."))
-    print("\n" + "=" * 80 + "\n")
+    return {
+        "summary": f"Error: {str(error)}",
+        "analysis": "Unable to analyze the calendar data.",
+        "recommendations": "Please check your API key and try again."
+    }
+
+def submit_claude_batch(events_texts: List[str], api_key: Optional[str] = None) -> str:
+    """
+    Submit several calendar analyses to Claude as a single Message Batch.
+    
+    Batches are processed asynchronously and billed at half the interactive
+    price, so this is the preferred path when analyzing many calendars or
+    date ranges at once.
+    
+    Args:
+        events_texts: Formatted strings of calendar events, one per analysis.
+        api_key: Anthropic API key. If None, will try to get from environment.
+        
+    Returns:
+        The ID of the created batch, to be passed to ``poll_claude_batch``.
+    """
+    client = _get_client(_resolve_api_key(api_key))
+    
+    batch = client.messages.batches.create(
+        requests=[
+            {"custom_id": f"job-{i}", "params": _message_params(events_text)}
+            for i, events_text in enumerate(events_texts)
+        ]
+    )
+    return batch.id
+
+def poll_claude_batch(batch_id: str, api_key: Optional[str] = None,
+                      poll_interval: float = BATCH_POLL_INTERVAL) -> List[Dict[str, str]]:
+    """
+    Wait for a Message Batch to finish and collect its analyses.
+    
+    Args:
+        batch_id: ID returned by ``submit_claude_batch``.
+        api_key: Anthropic API key. If None, will try to get from environment.
+        poll_interval: Seconds to wait between status checks.
+        
+    Returns:
+        List of analysis dictionaries, in the order the texts were submitted.
+    """
+    client = _get_client(_resolve_api_key(api_key))
+    
+    while client.messages.batches.retrieve(batch_id).processing_status != "ended":
+        time.sleep(poll_interval)
+    
+    analyses = {}
+    for entry in client.messages.batches.results(batch_id):
+        index = int(entry.custom_id.split('-', 1)[1])
+        if entry.result.type == "succeeded":
+            analyses[index] = _analysis_from_message(entry.result.message)
+        elif entry.result.type == "errored":
+            analyses[index] = _error_analysis(entry.result.error.error.message)
+        else:
+            analyses[index] = _error_analysis(f"Batch request {entry.result.type}")
+    
+    return [analyses[index] for index in sorted(analyses)]
+
+async def _analyze_async(client: AsyncAnthropic, events_text: str) -> Dict[str, str]:
+    """
+    Analyze one block of calendar events with an open AsyncAnthropic client.
+    
+    Args:
+        client: AsyncAnthropic client to send the request with.
+        events_text: Formatted string of calendar events.
+        
+    Returns:
+        Dictionary containing summary, analysis, and recommendations.
+    """
+    try:
+        # Stream the response from Claude
+        async with client.messages.stream(**_message_params(events_text)) as stream:
+            message = await stream.get_final_message()
+        
+        # Extract the structured response
+        return _analysis_from_message(message)
+    except Exception as e:
+        return _error_analysis(e)
+
+async def get_claude_analysis_async(events_text: str,
+                                    api_key: Optional[str] = None) -> Dict[str, str]:
+    """
+    Use Anthropic's Claude API to analyze calendar events without blocking the event loop.
+    
+    Args:
+        events_text: Formatted string of calendar events.
+        api_key: Anthropic API key. If None, will try to get from environment.
+        
+    Returns:
+        Dictionary containing summary, analysis, and recommendations.
+    """
+    api_key = _resolve_api_key(api_key)
+    
+    # The client's connection pool is bound to this event loop, so close it here
+    async with AsyncAnthropic(api_key=api_key) as client:
+        return await _analyze_async(client, events_text)
+
+async def get_claude_analyses_async(events_texts: List[str],
+                                    api_key: Optional[str] = None) -> List[Dict[str, str]]:
+    """
+    Analyze several blocks of calendar events concurrently.
+    
+    Args:
+        events_texts: Formatted strings of calendar events, one per analysis.
+        api_key: Anthropic API key. If None, will try to get from environment.
+        
+    Returns:
+        List of analysis dictionaries, in the same order as ``events_texts``.
+    """
+    api_key = _resolve_api_key(api_key)
+    
+    # Share one client (and its connection pool) across the concurrent requests
+    async with AsyncAnthropic(api_key=api_key) as client:
+        return await asyncio.gather(
+            *(_analyze_async(client, events_text) for events_text in events_texts)
+        )
+
+def get_claude_analysis(events_text: str, api_key: Optional[str] = None,
+                        batch: bool = False) -> Dict[str, str]:
+    """
+    Use Anthropic's Claude API to analyze calendar events.
+    
+    Args:
+        events_text: Formatted string of calendar events.
+        api_key: Anthropic API key. If None, will try to get from environment.
+        batch: Whether to go through the (cheaper, slower) Message Batches API
+            instead of a single interactive request.
+        
+    Returns:
+        Dictionary containing summary, analysis, and recommendations.
+    """
+    api_key = _resolve_api_key(api_key)
+    
+    if not batch:
+        return asyncio.run(get_claude_analysis_async(events_text, api_key=api_key))
+    
+    try:
+        batch_id = submit_claude_batch([events_text], api_key=api_key)
+        return poll_claude_batch(batch_id, api_key=api_key)[0]
+    except Exception as e:
+        return _error_analysis(e)
 
 def main():
     """Main function to run the script."""
@@ -290,6 +422,8 @@ def main():
                         help=f"Number of days to analyze (default: {DEFAULT_DAYS})")
     parser.add_argument("--api-key", type=str, default=None,
                         help="Anthropic API key (if not provided, will use ANTHROPIC_API_KEY from .env or environment)")
+    parser.add_argument("--batch", action="store_true",
+                        help="Use the Message Batches API (half price, results may take minutes)")
     args = parser.parse_args()
     
     try:
@@ -308,7 +442,7 @@ def main():
         
         # Get analysis from Claude
         print("Analyzing events with Claude AI...")
-        analysis = get_claude_analysis(events_text, api_key=args.api_key)
+        analysis = get_claude_analysis(events_text, api_key=args.api_key, batch=args.batch)
         
         # Display the analysis
         display_analysis(analysis)
@@ -0,0 +1,139 @@
+#!/usr/bin/env python3
+"""
+Calendar Analysis Common Module
+
+This module holds the pieces shared by the Claude-powered and local calendar
+analysis scripts: retrieving events, categorizing them, and displaying the
+resulting analysis.
+"""
+
+import sys
+import functools
+from typing import List, Dict, Any, Optional
+from calendar_api import GoogleCalendarAPI
+
+# Default number of days to analyze
+DEFAULT_DAYS = 7
+
+# Categories in the fixed order they are reported in
+CATEGORY_ORDER = ("work", "meeting", "personal", "travel", "social", "health", "other")
+
+# Simple keyword-based categorization, checked in order
+_KEYWORDS = (
+    ("work", ("work", "project", "deadline", "report", "task", "review", "client")),
+    ("meeting", ("meeting", "call", "conference", "sync", "discussion", "interview", "1:1", "1on1")),
+    ("travel", ("flight", "train", "trip", "travel", "commute", "drive", "airport")),
+    ("social", ("dinner", "lunch", "coffee", "drinks", "party", "celebration", "birthday", "wedding", "restaurant")),
+    ("health", ("doctor", "dentist", "gym", "workout", "exercise", "therapy", "medical", "appointment")),
+)
+
+def get_calendar_events(days_back: int = DEFAULT_DAYS, include_details: bool = True) -> List[Dict[str, Any]]:
+    """
+    Retrieve calendar events from the specified number of days back.
+    
+    Args:
+        days_back: Number of days to look back for events.
+        include_details: Whether to include additional event details.
+        
+    Returns:
+        List of formatted calendar events.
+    """
+    calendar_api = GoogleCalendarAPI()
+    events = calendar_api.iter_events(days_back=days_back, include_details=include_details)
+    return calendar_api.format_events(events, include_details=include_details)
+
+@functools.lru_cache(maxsize=4096)
+def _categorize_text(title: str, desc: str, location: str) -> Optional[str]:
+    """
+    Match event text against the category keywords.
+    
+    Cached on the raw fields because recurring events repeat the same text
+    many times; the fields are only joined on a cache miss.
+    
+    Args:
+        title: The event's title.
+        desc: The event's description.
+        location: The event's location.
+        
+    Returns:
+        The name of the first matching category, or None.
+    """
+    combined_text = f"{title} {desc} {location}".lower()
+    for category, terms in _KEYWORDS:
+        if any(term in combined_text for term in terms):
+            return category
+    return None
+
+def get_event_category(event: Dict[str, Any]) -> str:
+    """
+    Determine the category of a single event from its title, description and location.
+    
+    Args:
+        event: A calendar event.
+        
+    Returns:
+        The name of the event's category.
+    """
+    title = event.get("summary", "")
+    
+    # Try to match to a category
+    category = _categorize_text(title, event.get("description", ""), event.get("location", ""))
+    if category:
+        return category
+    
+    # If no match, check if it's likely personal or put in "other"
+    title = title.lower()
+    if any(attendee.partition('@')[0] in title for attendee in event.get("attendees", ())):
+        return "personal"
+    return "other"
+
+def categorize_events(events: List[Dict[str, Any]]) -> Dict[str, List[Dict[str, Any]]]:
+    """
+    Attempt to categorize events into common types based on their titles and descriptions.
+    This is a simple heuristic approach that can be improved with more sophisticated methods.
+    
+    Args:
+        events: List of calendar events.
+        
+    Returns:
+        Dictionary mapping category names to lists of events.
+    """
+    categories = {category: [] for category in CATEGORY_ORDER}
+    
+    for event in events:
+        categories[get_event_category(event)].append(event)
+    
+    return categories
+
+def display_analysis(analysis: Dict[str, str], title: str = "CALENDAR ANALYSIS"):
+    """
+    Display the calendar analysis in a formatted way.
+    
+    Args:
+        analysis: Dictionary containing summary, analysis, and recommendations.
+        title: Heading printed above the analysis.
+    """
+    lines = [
+        "",
+        "=" * 80,
+        title.center(80),
+        "=" * 80,
+        "",
+        "📅 SUMMARY",
+        "-" * 80,
+        str(analysis.get("summary", "No summary available.")),
+        "",
+        "📊 ANALYSIS",
+        "-" * 80,
+        str(analysis.get("analysis", "No analysis available.")),
+        "",
+        "💡 RECOMMENDATIONS",
+        "-" * 80,
+        str(analysis.get("recommendations", "No recommendations available.")),
+        "",
+        "=" * 80,
+        "",
+    ]
+    
+    # Write the whole report at once so concurrent output can't interleave
+    sys.stdout.write("\n".join(lines) + "\n")
@@ -10,84 +10,15 @@ import os
 import json
 import datetime
 import argparse
+from collections import Counter
+from operator import itemgetter
 from typing import List, Dict, Any, Optional
 from dotenv import load_dotenv
-from calendar_api import GoogleCalendarAPI, get_last_seven_days_events
+from calendar_analysis_common import CATEGORY_ORDER, DEFAULT_DAYS, get_calendar_events, categorize_events, get_event_category, display_analysis
 
 # Load environment variables from .env file
 load_dotenv()
 
-# Default number of days to analyze
-DEFAULT_DAYS = 7
-
-def get_calendar_events(days_back: int = DEFAULT_DAYS, include_details: bool = True) -> List[Dict[str, Any]]:
-    """
-    Retrieve calendar events from the specified number of days back.
-    
-    Args:
-        days_back: Number of days to look back for events.
-        include_details: Whether to include additional event details.
-        
-    Returns:
-        List of formatted calendar events.
-    """
-    calendar_api = GoogleCalendarAPI()
-    events = calendar_api.get_events(days_back=days_back)
-    return calendar_api.format_events(events, include_details=include_details)
-
-def categorize_events(events: List[Dict[str, Any]]) -> Dict[str, List[Dict[str, Any]]]:
-    """
-    Attempt to categorize events into common types based on their titles and descriptions.
-    This is a simple heuristic approach that can be improved with more sophisticated methods.
-    
-    Args:
-        events: List of calendar events.
-        
-    Returns:
-        Dictionary mapping category names to lists of events.
-    """
-    categories = {
-        "work": [],
-        "meeting": [],
-        "personal": [],
-        "travel": [],
-        "social": [],
-        "health": [],
-        "other": []
-    }
-    
-    # Simple keyword-based categorization
-    keywords = {
-        "work": ["work", "project", "deadline", "report", "task", "review", "client"],
-        "meeting": ["meeting", "call", "conference", "sync", "discussion", "interview", "1:1", "1on1"],
-        "travel": ["flight", "train", "trip", "travel", "commute", "drive", "airport"],
-        "social": ["dinner", "lunch", "coffee", "drinks", "party", "celebration", "birthday", "wedding", "restaurant"],
-        "health": ["doctor", "dentist", "gym", "workout", "exercise", "therapy", "medical", "appointment"],
-    }
-    
-    for event in events:
-        title = event.get("summary", "").lower()
-        desc = event.get("description", "").lower()
-        location = event.get("location", "").lower()
-        combined_text = f"{title} {desc} {location}"
-        
-        # Try to match to a category
-        matched = False
-        for category, terms in keywords.items():
-            if any(term in combined_text for term in terms):
-                categories[category].append(event)
-                matched = True
-                break
-        
-        # If no match, check if it's likely personal or put in "other"
-        if not matched:
-            if any(attendee.split('@')[0] in title.lower() for attendee in event.get("attendees", [])):
-                categories["personal"].append(event)
-            else:
-                categories["other"].append(event)
-    
-    return categories
-
 def analyze_events(events: List[Dict[str, Any]], days_back: int) -> Dict[str, str]:
     """
     Perform a local analysis of calendar events without using the Anthropic API.
@@ -106,43 +37,34 @@ def analyze_events(events: List[Dict[str, Any]], days_back: int) -> Dict[str, st
             "recommendations": "No recommendations available."
         }
     
-    # Categorize events
-    categories = categorize_events(events)
-    
-    # Count events by category
-    category_counts = {category: len(events_list) for category, events_list in categories.items() if events_list}
-    
-    # Count events by day
-    events_by_day = {}
+    # Count events by category and by day in a single pass
+    category_counts = Counter()
+    day_counts = Counter()
     for event in events:
-        date_str = event['start'].split('T')[0] if 'T' in event['start'] else event['start']
-        if date_str not in events_by_day:
-            events_by_day[date_str] = []
-        events_by_day[date_str].append(event)
+        category_counts[get_event_category(event)] += 1
+        day_counts[event['start'].partition('T')[0]] += 1
     
     # Calculate busiest and lightest days
-    day_counts = {day: len(day_events) for day, day_events in events_by_day.items()}
-    busiest_day = max(day_counts.items(), key=lambda x: x[1]) if day_counts else ("None", 0)
-    lightest_day = min(day_counts.items(), key=lambda x: x[1]) if day_counts else ("None", 0)
+    busiest_day = day_counts.most_common(1)[0]
+    lightest_day = min(day_counts.items(), key=itemgetter(1))
     
     # Calculate average events per day
-    avg_events_per_day = len(events) / len(events_by_day) if events_by_day else 0
+    avg_events_per_day = len(events) / len(day_counts)
     
     # Generate summary
     summary = (
         f"Over the past {days_back} days, you had {len(events)} events "
-        f"across {len(events_by_day)} days, averaging {avg_events_per_day:.1f} events per day. "
+        f"across {len(day_counts)} days, averaging {avg_events_per_day:.1f} events per day. "
     )
     
-    # Generate analysis
-    analysis = (
-        f"Your calendar shows the following distribution of events: "
+    # Generate analysis (ties keep the fixed category order)
+    distribution = "".join(
+        f"{category.capitalize()}: {count} events ({count/len(events)*100:.1f}%), "
+        for category, count in sorted(
+            category_counts.items(), key=lambda kv: (-kv[1], CATEGORY_ORDER.index(kv[0])))
     )
-    for category, count in sorted(category_counts.items(), key=lambda x: x[1], reverse=True):
-        if count > 0:
-            analysis += f"{category.capitalize()}: {count} events ({count/len(events)*100:.1f}%), "
-    
-    analysis += (
+    analysis = (
+        f"Your calendar shows the following distribution of events: {distribution}"
         f"Your busiest day was {busiest_day[0]} with {busiest_day[1]} events, "
         f"while your lightest day was {lightest_day[0]} with {lightest_day[1]} events. "
     )
@@ -174,32 +96,6 @@ def analyze_events(events: List[Dict[str, Any]], days_back: int) -> Dict[str, st
         "recommendations": recommendations
     }
 
-def display_analysis(analysis: Dict[str, str]):
-    """
-    Display the calendar analysis in a formatted way.
-    
-    Args:
-        analysis: Dictionary containing summary, analysis, and recommendations.
-    """
-    print("\n" + "=" * 80)
-    print("CALENDAR ANALYSIS (LOCAL)".center(80))
-    print("=" * 80 + "\n")
-    
-    print("📅 SUMMARY")
-    print("-" * 80)
-    print(analysis.get("summary", "No summary available."))
-    print()
-    
-    print("📊 ANALYSIS")
-    print("-" * 80)
-    print(analysis.get("analysis", "No analysis available."))
-    print()
-    
-    print("💡 RECOMMENDATIONS")
-    print("-" * 80)
-    print(analysis.get("recommendations", "No recommendations available."))
-    print("\n" + "=" * 80 + "\n")
-
 def main():
     """Main function to run the script."""
     parser = argparse.ArgumentParser(description="Analyze calendar events locally")
@@ -223,7 +119,7 @@ def main():
         analysis = analyze_events(events, args.days)
         
         # Display the analysis
-        display_analysis(analysis)
+        display_analysis(analysis, title="CALENDAR ANALYSIS (LOCAL)")
         
     except Exception as e:
         print(f"An error occurred: {e}")
@@ -6,19 +6,141 @@ This module provides functions to interact with Google Calendar API,
 including authentication and retrieving events within a specified date range.
 """
 
-import os
 import datetime
-import json
-from typing import List, Dict, Any, Optional, Union
+import functools
+from pathlib import Path
+from typing import List, Dict, Any, Iterable, Iterator, Optional, Union
 from dateutil.parser import parse
 from google.oauth2.credentials import Credentials
 from google_auth_oauthlib.flow import InstalledAppFlow
 from google.auth.transport.requests import Request
 from googleapiclient.discovery import build
 
+# Use ciso8601's C parser for event timestamps when it's installed
+try:
+    from ciso8601 import parse_datetime as _fromisoformat
+except ImportError:
+    _fromisoformat = datetime.datetime.fromisoformat
+
 # Define the scopes required for Google Calendar API
 SCOPES = ['https://www.googleapis.com/auth/calendar.readonly']
 
+# Partial-response mask covering every event field used by format_events
+EVENT_FIELDS = (
+    'nextPageToken,'
+    'items(id,summary,description,location,start,end,attendees/email,'
+    'creator/email,organizer/email,status,htmlLink)'
+)
+
+# Shorter mask for when format_events is called without include_details
+EVENT_SUMMARY_FIELDS = 'nextPageToken,items(id,summary,start,end)'
+
+# The Calendar API accepts at most this many calls in one batch request
+MAX_BATCH_SIZE = 50
+
+# Series fields added to either mask when recurring events are not expanded,
+# so callers can expand series themselves and drop cancelled occurrences
+RECURRENCE_FIELDS = 'recurrence,recurringEventId,originalStartTime'
+
+# Resolve the UTC timezone once (datetime.UTC is only available on Python 3.11+)
+try:
+    _UTC = datetime.UTC
+except AttributeError:
+    _UTC = datetime.timezone.utc
+
+# Bound once to avoid attribute lookups on the per-call and per-event paths
+_now = datetime.datetime.now
+_td = datetime.timedelta
+_date_fromisoformat = datetime.date.fromisoformat
+_ONE_DAY = _td(days=1)
+
+# Compact RFC3339 format for UTC query bounds
+_RFC3339_UTC = '%Y-%m-%dT%H:%M:%SZ'
+
+def _parse_rfc3339(value: str) -> datetime.datetime:
+    """
+    Parse an RFC3339 timestamp as returned by the Google Calendar API.
+    
+    Args:
+        value: Timestamp string, e.g. '2024-01-01T09:30:00-05:00'.
+        
+    Returns:
+        A timezone-aware datetime.
+    """
+    try:
+        return _fromisoformat(value)
+    except ValueError:
+        pass
+    
+    try:
+        # Python < 3.11 fromisoformat doesn't accept a trailing 'Z'
+        return datetime.datetime.fromisoformat(value.replace('Z', '+00:00'))
+    except ValueError:
+        # Fall back to dateutil for anything fromisoformat can't handle
+        return parse(value)
+
+def _authenticate(credentials_path: str, token_path: str) -> Credentials:
+    """
+    Authenticate with Google Calendar API.
+    
+    Args:
+        credentials_path: Path to the credentials.json file.
+        token_path: Path to save/load the token.json file.
+        
+    Returns:
+        Authorized Google OAuth credentials.
+    """
+    creds = None
+    
+    # Load previously saved credentials from token.json, if any
+    try:
+        creds = Credentials.from_authorized_user_file(token_path, SCOPES)
+    except FileNotFoundError:
+        pass
+    except Exception as e:
+        print(f"Error loading token: {e}")
+    
+    # If credentials don't exist or are invalid, get new ones
+    if not creds or not creds.valid:
+        if creds and creds.expired and creds.refresh_token:
+            creds.refresh(Request())
+        else:
+            # Load client secrets from credentials.json
+            try:
+                flow = InstalledAppFlow.from_client_secrets_file(
+                    credentials_path, SCOPES)
+            except FileNotFoundError:
+                raise FileNotFoundError(
+                    f"{credentials_path} file not found. Please download it from "
+                    "Google Cloud Console and save it in the current directory."
+                ) from None
+            creds = flow.run_local_server(port=0)
+        
+        # Save the credentials for future runs
+        Path(token_path).write_text(creds.to_json())
+    
+    return creds
+
+@functools.lru_cache(maxsize=4)
+def _build_service(credentials_path: str, token_path: str):
+    """
+    Build a Google Calendar API service, shared by every caller using the same files.
+    
+    Authentication and parsing the discovery document only happen once per
+    process for a given pair of paths.
+    
+    Args:
+        credentials_path: Path to the credentials.json file.
+        token_path: Path to save/load the token.json file.
+        
+    Returns:
+        A Google Calendar API service object.
+    """
+    creds = _authenticate(credentials_path, token_path)
+    
+    # Build and return the Google Calendar API service
+    return build('calendar', 'v3', credentials=creds, static_discovery=True)
+
 class GoogleCalendarAPI:
     """Class to interact with Google Calendar API."""
     
@@ -33,153 +155,283 @@ class GoogleCalendarAPI:
         """
         self.credentials_path = credentials_path
         self.token_path = token_path
-        self.service = self._authenticate()
+        self.service = _build_service(credentials_path, token_path)
     
-    def _authenticate(self):
+    def _time_range(self, days_back: int):
         """
-        Authenticate with Google Calendar API.
+        Compute the RFC3339 time range covering the last `days_back` days.
         
+        Args:
+            days_back: Number of days to look back for events.
+            
         Returns:
-            A Google Calendar API service object.
+            Tuple of (start, end) timestamps as RFC3339 strings.
         """
-        creds = None
+        # Calculate time range using timezone-aware objects
+        now = _now(_UTC)
+        start_date = now - _td(days=days_back)
         
-        # Check if token.json exists (for previously saved credentials)
-        if os.path.exists(self.token_path):
-            try:
-                creds = Credentials.from_authorized_user_info(
-                    json.loads(open(self.token_path).read()), SCOPES)
-            except Exception as e:
-                print(f"Error loading token: {e}")
-        
-        # If credentials don't exist or are invalid, get new ones
-        if not creds or not creds.valid:
-            if creds and creds.expired and creds.refresh_token:
-                creds.refresh(Request())
-            else:
-                # Load client secrets from credentials.json
-                if not os.path.exists(self.credentials_path):
-                    raise FileNotFoundError(
-                        f"{self.credentials_path} file not found. Please download it from "
-                        "Google Cloud Console and save it in the current directory."
-                    )
-                
-                flow = InstalledAppFlow.from_client_secrets_file(
-                    self.credentials_path, SCOPES)
-                creds = flow.run_local_server(port=0)
+        # Format times in RFC3339 format, as whole seconds in UTC ('Z')
+        return start_date.strftime(_RFC3339_UTC), now.strftime(_RFC3339_UTC)
+    
+    def _list_request(self, calendar_id: str, time_min: str, time_max: str,
+                      max_results: int, include_recurring: bool,
+                      include_details: bool = True):
+        """
+        Build an events().list request restricted to the fields we format.
+        
+        Args:
+            calendar_id: ID of the calendar to fetch events from.
+            time_min: Start of the time range (RFC3339).
+            time_max: End of the time range (RFC3339).
+            max_results: Maximum number of events per page.
+            include_recurring: Whether to expand recurring events into their
+                individual occurrences. If False, each recurring series is
+                returned once with its recurrence rules, cancelled occurrences
+                come back without start or end, and events are not sorted by
+                start time.
+            include_details: Whether to request the fields needed for
+                detailed formatting, or only the basic ones.
+            
+        Returns:
+            An unexecuted googleapiclient HttpRequest.
+        """
+        fields = EVENT_FIELDS if include_details else EVENT_SUMMARY_FIELDS
+        if include_recurring:
+            # Ordering by start time is only allowed when recurring events are expanded
+            ordering = {'orderBy': 'startTime'}
+        else:
+            ordering = {}
+            fields = fields.replace('items(', f'items({RECURRENCE_FIELDS},', 1)
+        
+        return self.service.events().list(
+            calendarId=calendar_id,
+            timeMin=time_min,
+            timeMax=time_max,
+            maxResults=max_results,
+            singleEvents=include_recurring,  # True expands recurring events
+            fields=fields,
+            prettyPrint=False,  # responses are gzipped, but compact JSON is still smaller
+            **ordering
+        )
+    
+    def _iter_pages(self, request,
+                    response: Optional[Dict[str, Any]] = None) -> Iterator[Dict[str, Any]]:
+        """
+        Execute an events().list request, following `nextPageToken` to the end.
+        
+        Args:
+            request: The events().list request for the first page.
+            response: The already-fetched first page, if any.
             
-            # Save the credentials for future runs
-            with open(self.token_path, 'w') as token:
-                token.write(creds.to_json())
+        Yields:
+            Calendar events, one page at a time.
+        """
+        while request is not None:
+            if response is None:
+                response = request.execute()
+            yield from response.get('items', [])
+            request = self.service.events().list_next(request, response)
+            response = None
+    
+    def iter_events(self,
+                    days_back: int = 7,
+                    calendar_id: str = 'primary',
+                    max_results: int = 250,
+                    include_recurring: bool = True,
+                    include_details: bool = True) -> Iterator[Dict[str, Any]]:
+        """
+        Lazily retrieve events from a specified number of days back until now.
         
-        # Build and return the Google Calendar API service
-        return build('calendar', 'v3', credentials=creds)
+        Pages are only requested as the caller consumes the previous one, so
+        memory use is bounded by the page size rather than the total.
+        
+        Args:
+            days_back: Number of days to look back for events.
+            calendar_id: ID of the calendar to fetch events from.
+            max_results: Maximum number of events to fetch per page.
+            include_recurring: Whether to expand recurring events into their
+                individual occurrences. If False, each recurring series is
+                returned once with its recurrence rules, cancelled occurrences
+                come back without start or end, and events are not sorted by
+                start time.
+            include_details: Whether the events will be formatted with
+                details; if False, only the basic fields are fetched.
+            
+        Yields:
+            Calendar events.
+        """
+        start_date_str, now_str = self._time_range(days_back)
+        
+        # Query for events
+        yield from self._iter_pages(self._list_request(
+            calendar_id, start_date_str, now_str, max_results, include_recurring,
+            include_details))
     
     def get_events(self, 
                   days_back: int = 7, 
                   calendar_id: str = 'primary',
-                  max_results: int = 100,
-                  include_recurring: bool = True) -> List[Dict[str, Any]]:
+                  max_results: int = 250,
+                  include_recurring: bool = True,
+                  include_details: bool = True) -> List[Dict[str, Any]]:
         """
         Retrieve events from a specified number of days back until now.
         
         Args:
             days_back: Number of days to look back for events.
             calendar_id: ID of the calendar to fetch events from.
-            max_results: Maximum number of events to return.
-            include_recurring: Whether to include recurring events.
+            max_results: Maximum number of events to fetch per page; all
+                pages are retrieved.
+            include_recurring: Whether to expand recurring events into their
+                individual occurrences. If False, each recurring series is
+                returned once with its recurrence rules, cancelled occurrences
+                come back without start or end, and events are not sorted by
+                start time.
+            include_details: Whether the events will be formatted with
+                details; if False, only the basic fields are fetched.
             
         Returns:
             List of calendar events.
         """
-        # Calculate time range using timezone-aware objects
-        try:
-            # For Python 3.11+
-            now = datetime.datetime.now(datetime.UTC)
-        except AttributeError:
-            # For older Python versions
-            now = datetime.datetime.now(datetime.timezone.utc)
+        return list(self.iter_events(days_back, calendar_id, max_results,
+                                     include_recurring, include_details))
+    
+    def get_events_multi(self,
+                         calendar_ids: List[str],
+                         days_back: int = 7,
+                         max_results: int = 250,
+                         include_recurring: bool = True,
+                         include_details: bool = True) -> Dict[str, List[Dict[str, Any]]]:
+        """
+        Retrieve events from several calendars in batched HTTP requests.
+        
+        Calendars are sent MAX_BATCH_SIZE per batch. Only the first page of
+        each calendar is batched; any further pages are fetched individually. Duplicate IDs are fetched once, and if any
+        calendar fails its error is raised, as get_events would.
+        
+        Args:
+            calendar_ids: IDs of the calendars to fetch events from.
+            days_back: Number of days to look back for events.
+            max_results: Maximum number of events to fetch per page.
+            include_recurring: Whether to expand recurring events into their
+                individual occurrences. If False, each recurring series is
+                returned once with its recurrence rules, cancelled occurrences
+                come back without start or end, and events are not sorted by
+                start time.
+            include_details: Whether the events will be formatted with
+                details; if False, only the basic fields are fetched.
             
-        start_date = now - datetime.timedelta(days=days_back)
+        Returns:
+            Dictionary mapping each calendar ID to its list of calendar events.
+        """
+        start_date_str, now_str = self._time_range(days_back)
+        requests = {}
+        responses = {}
+        errors = {}
         
-        # Format times in RFC3339 format
-        now_str = now.isoformat()  # isoformat() includes the timezone info
-        start_date_str = start_date.isoformat()
+        def collect(request_id, response, exception):
+            if exception is not None:
+                errors[request_id] = exception
+            else:
+                responses[request_id] = response
         
-        # Query for events
-        events_result = self.service.events().list(
-            calendarId=calendar_id,
-            timeMin=start_date_str,
-            timeMax=now_str,
-            maxResults=max_results,
-            singleEvents=include_recurring,  # True expands recurring events
-            orderBy='startTime'
-        ).execute()
+        # Batch request IDs must be unique, so duplicate calendars are dropped
+        calendar_ids = list(dict.fromkeys(calendar_ids))
+        
+        # Queue one events().list call per calendar and send them in batches
+        for i in range(0, len(calendar_ids), MAX_BATCH_SIZE):
+            batch = self.service.new_batch_http_request(callback=collect)
+            for calendar_id in calendar_ids[i:i + MAX_BATCH_SIZE]:
+                requests[calendar_id] = self._list_request(
+                    calendar_id, start_date_str, now_str, max_results, include_recurring,
+                    include_details)
+                batch.add(requests[calendar_id], request_id=calendar_id)
+            batch.execute()
+        
+        # Don't let a failed calendar pass for an empty one
+        for calendar_id in requests:
+            if calendar_id in errors:
+                raise errors[calendar_id]
+        
+        return {
+            calendar_id: list(self._iter_pages(request, responses[calendar_id]))
+            for calendar_id, request in requests.items()
+        }
+    
+    @staticmethod
+    def _format_one(event: Dict[str, Any], include_details: bool) -> Dict[str, Any]:
+        """
+        Format a single calendar event.
+        
+        Args:
+            event: A Google Calendar event object.
+            include_details: Whether to include additional event details.
+            
+        Returns:
+            The formatted event dictionary.
+        """
+        start_field = event['start']
+        end_field = event['end']
+        
+        # Determine if it's an all-day event
+        is_all_day = 'dateTime' not in start_field
         
-        return events_result.get('items', [])
+        # Format start and end times
+        if is_all_day:
+            start_obj = _date_fromisoformat(start_field['date'])
+            # Adjust end date (Google Calendar sets end date as day after)
+            end_obj = _date_fromisoformat(end_field['date']) - _ONE_DAY
+        else:
+            start_obj = _parse_rfc3339(start_field['dateTime'])
+            end_obj = _parse_rfc3339(end_field['dateTime'])
+        
+        # Create formatted event dictionary
+        formatted_event = {
+            'id': event.get('id', ''),
+            'summary': event.get('summary', 'No Title'),
+            'start': start_obj.isoformat(),
+            'end': end_obj.isoformat(),
+            'is_all_day': is_all_day,
+        }
+        
+        # Keep the series data of unexpanded recurring events
+        if 'recurrence' in event:
+            formatted_event['recurrence'] = event['recurrence']
+        if 'recurringEventId' in event:
+            formatted_event['recurring_event_id'] = event['recurringEventId']
+        
+        # Add additional details if requested
+        if include_details:
+            formatted_event.update({
+                'description': event.get('description', ''),
+                'location': event.get('location', ''),
+                'creator': event.get('creator', {}).get('email', ''),
+                'organizer': event.get('organizer', {}).get('email', ''),
+                'attendees': [a.get('email') for a in event.get('attendees', [])],
+                'status': event.get('status', ''),
+                'link': event.get('htmlLink', '')
+            })
+        
+        return formatted_event
     
-    def format_events(self, events: List[Dict[str, Any]], 
+    def format_events(self, events: Iterable[Dict[str, Any]], 
                      include_details: bool = False) -> List[Dict[str, Any]]:
         """
         Format calendar events into a more usable structure.
         
+        Cancelled occurrences of unexpanded recurring series are skipped,
+        since they have no start or end.
+        
         Args:
-            events: List of Google Calendar event objects.
+            events: Google Calendar event objects (a list or an iterator
+                such as `iter_events`).
             include_details: Whether to include additional event details.
             
         Returns:
             List of formatted event dictionaries.
         """
-        formatted_events = []
-        
-        for event in events:
-            # Get basic event info
-            event_id = event.get('id', '')
-            summary = event.get('summary', 'No Title')
-            description = event.get('description', '')
-            location = event.get('location', '')
-            
-            # Get start and end times
-            start = event['start'].get('dateTime', event['start'].get('date'))
-            end = event['end'].get('dateTime', event['end'].get('date'))
-            
-            # Determine if it's an all-day event
-            is_all_day = 'date' in event['start'] and 'dateTime' not in event['start']
-            
-            # Format start and end times
-            if is_all_day:
-                start_obj = datetime.datetime.strptime(start, '%Y-%m-%d').date()
-                end_obj = datetime.datetime.strptime(end, '%Y-%m-%d').date()
-                # Adjust end date (Google Calendar sets end date as day after)
-                end_obj = end_obj - datetime.timedelta(days=1)
-            else:
-                start_obj = parse(start)
-                end_obj = parse(end)
-            
-            # Create formatted event dictionary
-            formatted_event = {
-                'id': event_id,
-                'summary': summary,
-                'start': start_obj.isoformat(),
-                'end': end_obj.isoformat(),
-                'is_all_day': is_all_day,
-            }
-            
-            # Add additional details if requested
-            if include_details:
-                formatted_event.update({
-                    'description': description,
-                    'location': location,
-                    'creator': event.get('creator', {}).get('email', ''),
-                    'organizer': event.get('organizer', {}).get('email', ''),
-                    'attendees': [a.get('email') for a in event.get('attendees', [])],
-                    'status': event.get('status', ''),
-                    'link': event.get('htmlLink', '')
-                })
-            
-            formatted_events.append(formatted_event)
-        
-        return formatted_events
+        format_one = self._format_one
+        return [format_one(event, include_details) for event in events if 'start' in event]
 
 def get_last_seven_days_events(credentials_path: str = 'credentials.json',
                               include_details: bool = False) -> List[Dict[str, Any]]:
@@ -194,7 +446,7 @@ def get_last_seven_days_events(credentials_path: str = 'credentials.json',
         List of formatted calendar events from the last 7 days.
     """
     calendar_api = GoogleCalendarAPI(credentials_path=credentials_path)
-    events = calendar_api.get_events(days_back=7)
+    events = calendar_api.iter_events(days_back=7, include_details=include_details)
     return calendar_api.format_events(events, include_details=include_details)
 
 if __name__ == '__main__':
@@ -211,7 +463,7 @@ if __name__ == '__main__':
                 if event['is_all_day']:
                     print(f"{event['start']} (All day) - {event['summary']}")
                 else:
-                    start_time = parse(event['start']).strftime('%Y-%m-%d %H:%M')
+                    start_time = _parse_rfc3339(event['start']).strftime('%Y-%m-%d %H:%M')
                     print(f"{start_time} - {event['summary']}")
                 
                 if 'location' in event and event['location']:
@@ -4,6 +4,7 @@ Example script demonstrating how to use the Google Calendar API module.
 """
 
 import json
+from collections import defaultdict
 from calendar_api import GoogleCalendarAPI, get_last_seven_days_events
 
 def example_1_basic_usage():
@@ -39,21 +40,16 @@ def example_3_custom_date_range():
     calendar_api = GoogleCalendarAPI()
     
     # Get events from the last 30 days
-    events = calendar_api.get_events(days_back=30)
+    events = calendar_api.get_events(days_back=30, include_details=False)
     formatted_events = calendar_api.format_events(events)
     
     print(f"Found {len(formatted_events)} events in the last 30 days")
     
     # Group events by day
-    events_by_day = {}
+    events_by_day = defaultdict(list)
     for event in formatted_events:
         # Get just the date part
-        date_str = event['start'].split('T')[0] if 'T' in event['start'] else event['start']
-        
-        if date_str not in events_by_day:
-            events_by_day[date_str] = []
-        
-        events_by_day[date_str].append(event)
+        events_by_day[event['start'].partition('T')[0]].append(event)
     
     # Print events grouped by day
     for date, day_events in sorted(events_by_day.items()):
@@ -8,7 +8,6 @@ from the last 7 days for the authenticated user.
 
 import os
 import datetime
-import json
 from dateutil.relativedelta import relativedelta
 from google.oauth2.credentials import Credentials
 from google_auth_oauthlib.flow import InstalledAppFlow
@@ -19,6 +18,18 @@ from googleapiclient.discovery import build
 # Using read-only scope for security
 SCOPES = ['https://www.googleapis.com/auth/calendar.readonly']
 
+# Resolve the UTC timezone once; datetime.UTC was added in Python 3.11
+try:
+    _UTC = datetime.UTC
+except AttributeError:
+    _UTC = datetime.timezone.utc
+
+_now = datetime.datetime.now
+_td = datetime.timedelta
+
+# Compact RFC3339 format for UTC query bounds
+_RFC3339_UTC = '%Y-%m-%dT%H:%M:%SZ'
+
 def authenticate_google_calendar():
     """
     Authenticate with Google Calendar API.
@@ -30,8 +41,7 @@ def authenticate_google_calendar():
     
     # Check if token.json exists (for previously saved credentials)
     if os.path.exists('token.json'):
-        creds = Credentials.from_authorized_user_info(
-            json.loads(open('token.json').read()), SCOPES)
+        creds = Credentials.from_authorized_user_file('token.json', SCOPES)
     
     # If credentials don't exist or are invalid, get new ones
     if not creds or not creds.valid:
@@ -68,29 +78,32 @@ def get_last_seven_days_events(service):
     """
     # Calculate time range (now to 7 days ago) using timezone-aware objects
     # Use UTC timezone for consistency
-    try:
-        # For Python 3.11+
-        now = datetime.datetime.now(datetime.UTC)
-    except AttributeError:
-        # For older Python versions
-        now = datetime.datetime.now(datetime.timezone.utc)
-    
-    seven_days_ago = now - datetime.timedelta(days=7)
+    now = _now(_UTC)
+    seven_days_ago = now - _td(days=7)
     
-    # Format times in RFC3339 format as required by Google Calendar API
-    now_str = now.isoformat()  # isoformat() includes the timezone info
-    seven_days_ago_str = seven_days_ago.isoformat()
+    # Format times in RFC3339 format as required by Google Calendar API,
+    # as whole seconds in UTC ('Z')
+    now_str = now.strftime(_RFC3339_UTC)
+    seven_days_ago_str = seven_days_ago.strftime(_RFC3339_UTC)
     
-    # Query for events
-    events_result = service.events().list(
+    # Query for events, following nextPageToken until every page is read
+    request = service.events().list(
         calendarId='primary',  # 'primary' refers to the user's primary calendar
         timeMin=seven_days_ago_str,
         timeMax=now_str,
+        maxResults=250,
         singleEvents=True,
-        orderBy='startTime'
-    ).execute()
+        orderBy='startTime',
+        fields='nextPageToken,items(summary,start)'  # Only what format_event uses
+    )
+    
+    events = []
+    while request is not None:
+        events_result = request.execute()
+        events.extend(events_result.get('items', []))
+        request = service.events().list_next(request, events_result)
     
-    return events_result.get('items', [])
+    return events
 
 def format_event(event):
     """
@@ -107,7 +120,11 @@ def format_event(event):
     
     # Format start time based on whether it's a full-day event or not
     if 'T' in start:  # Has time component
-        start_dt = datetime.datetime.fromisoformat(start.replace('Z', '+00:00'))
+        try:
+            start_dt = datetime.datetime.fromisoformat(start)
+        except ValueError:
+            # Python < 3.11 fromisoformat doesn't accept a trailing 'Z'
+            start_dt = datetime.datetime.fromisoformat(start.replace('Z', '+00:00'))
         start_formatted = start_dt.strftime('%Y-%m-%d %H:%M:%S')
     else:  # All-day event
         start_formatted = start
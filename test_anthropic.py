@@ -5,20 +5,26 @@ Test script for Anthropic API connection.
 
 import os
 import sys
+import functools
 from anthropic import Anthropic
 
+@functools.lru_cache(maxsize=1)
+def _get_client(api_key):
+    """Return a shared Anthropic client so repeated calls reuse its connection pool."""
+    return Anthropic(api_key=api_key)
+
 def test_anthropic_connection():
     """Test the connection to Anthropic's API."""
     # Check if API key is set
-    api_key = "sk-ant-REDACTED"
+    api_key = os.environ.get("ANTHROPIC_API_KEY")
     if not api_key:
         print("Error: ANTHROPIC_API_KEY environment variable is not set.")
         print("Please set it with: export ANTHROPIC_API_KEY=your_api_key_here")
         return False
     
     try:
-        # Initialize the client
-        client = Anthropic(api_key=api_key)
+        # Get the shared client
+        client = _get_client(api_key)
         
         # Send a simple test message
         response = client.messages.create(
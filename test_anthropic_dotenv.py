@@ -5,22 +5,34 @@ Test script for Anthropic API connection using dotenv.
 
 import os
 import sys
+import re
 import json
+import functools
 from dotenv import load_dotenv
 from anthropic import Anthropic, APIError, APIConnectionError, AuthenticationError
 
+@functools.lru_cache(maxsize=1)
+def _get_client(api_key):
+    """Return the Anthropic client for this key, created once and then reused."""
+    return Anthropic(api_key=api_key)
+
+# 'sk-ant-' followed by enough key characters to make at least 30 in total
+_API_KEY_RE = re.compile(r'sk-ant-.{23,}', re.DOTALL)
+
 def validate_api_key(api_key):
     """Validate the format of the Anthropic API key."""
+    if api_key and _API_KEY_RE.match(api_key):
+        return True, "API key format appears valid"
+    
+    # Work out which check failed so the message is specific
     if not api_key:
         return False, "API key is empty"
     
     if not api_key.startswith("sk-ant-"):
         return False, "API key should start with 'sk-ant-'"
     
-    if len(api_key) < 30:  # Anthropic keys are typically longer
-        return False, "API key appears too short"
-    
-    return True, "API key format appears valid"
+    # Anthropic keys are typically longer
+    return False, "API key appears too short"
 
 def test_anthropic_connection():
     """Test the connection to Anthropic's API using the key from .env."""
@@ -44,8 +56,8 @@ def test_anthropic_connection():
         print(f"Using API key: {api_key[:5]}...{api_key[-5:]} (length: {len(api_key)})")
     
     try:
-        # Initialize the client
-        client = Anthropic(api_key=api_key)
+        # Get the shared client
+        client = _get_client(api_key)
         
         # Send a simple test message
         print("Sending test request to Anthropic API...")